@@ -0,0 +1,289 @@
+"""
+Серверные алерты по уровню запаса.
+
+Правила хранятся в alert_rules и в памяти индексируются по позиции
+(name, color, volume) без учёта регистра — как уникальный индекс склада.
+Изменение позиции проверяется только по её правилам. Переходы
+состояния публикуются на /ws в топик ALERTS_TOPIC (и топики линейки):
+  - alert_triggered — условие стало выполняться;
+  - alert_cleared — условие перестало выполняться.
+Создание и удаление правил передаётся остальным воркерам через
+NOTIFY RULES_CHANNEL (см. inventory_state.channel_handlers).
+"""
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from . import database, inventory_state, models
+from .websocket import manager
+
+logger = logging.getLogger("uvicorn")
+
+ALERTS_TOPIC = "alerts"
+RULES_CHANNEL = "alert_rules_changed"
+# Окно, по которому считается средний расход для days_to_stockout_below
+CONSUMPTION_WINDOW_DAYS = int(os.getenv("ALERT_CONSUMPTION_WINDOW_DAYS", "30"))
+RULES_RELOAD_SECONDS = float(os.getenv("ALERT_RULES_RELOAD_SECONDS", "60"))
+
+PositionKey = Tuple[str, str, float]
+
+
+class Rule(NamedTuple):
+    id: int
+    kind: str
+    threshold: float
+    # Позиция правила: нужна, чтобы снять алерт, когда строки в базе уже нет
+    name: str
+    color: Optional[str]
+    volume: float
+
+
+def position_key(name: str, color: Optional[str], volume: float) -> PositionKey:
+    return (name.lower(), (color or "").lower(), float(volume))
+
+
+class AlertIndex:
+    def __init__(self):
+        self._rules_by_position: Dict[PositionKey, Dict[int, Rule]] = {}
+        self._position_by_rule: Dict[int, PositionKey] = {}
+        self.triggered: Set[int] = set()
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def load(self, db: Session) -> List[Rule]:
+        """Перечитывает правила. Возвращает сработавшие правила, которых больше нет в базе."""
+        rules = db.query(models.AlertRule).all()
+        with self._lock:
+            previous = self._rules_by_position
+            self._rules_by_position = {}
+            self._position_by_rule = {}
+            for rule in rules:
+                self._add(rule)
+            # Состояние сохраняется только для правил, которые ещё существуют
+            gone = [
+                rule for position_rules in previous.values() for rule in position_rules.values()
+                if rule.id in self.triggered and rule.id not in self._position_by_rule
+            ]
+            self.triggered &= self._position_by_rule.keys()
+            self.loaded = True
+            return gone
+
+    def _add(self, rule: models.AlertRule):
+        key = position_key(rule.name, rule.color, rule.volume)
+        self._rules_by_position.setdefault(key, {})[rule.id] = Rule(
+            rule.id, rule.kind, rule.threshold, rule.name, rule.color, rule.volume
+        )
+        self._position_by_rule[rule.id] = key
+
+    def add(self, rule: models.AlertRule):
+        with self._lock:
+            self._add(rule)
+
+    def remove(self, rule_id: int) -> Optional[Rule]:
+        """Удаляет правило из индекса. Возвращает его, если оно было сработавшим."""
+        with self._lock:
+            key = self._position_by_rule.pop(rule_id, None)
+            if key is None:
+                return None
+            rules = self._rules_by_position[key]
+            rule = rules.pop(rule_id)
+            if not rules:
+                del self._rules_by_position[key]
+            if rule_id not in self.triggered:
+                return None
+            self.triggered.discard(rule_id)
+            return rule
+
+    def rules_for(self, name: str, color: Optional[str], volume: float) -> List[Rule]:
+        return list(self._rules_by_position.get(position_key(name, color, volume), {}).values())
+
+    def set_triggered(self, rule_id: int, triggered: bool) -> bool:
+        """Возвращает True, если состояние правила изменилось."""
+        with self._lock:
+            if rule_id not in self._position_by_rule or (rule_id in self.triggered) == triggered:
+                return False
+            if triggered:
+                self.triggered.add(rule_id)
+            else:
+                self.triggered.discard(rule_id)
+            return True
+
+
+index = AlertIndex()
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def daily_consumption(db: Session, name: str, volume: float) -> float:
+    """
+    Средний расход позиции (бутылок в день) за CONSUMPTION_WINDOW_DAYS.
+    Открытые бутылки не хранят цвет, поэтому расход считается по name и volume.
+    """
+    since = datetime.now() - timedelta(days=CONSUMPTION_WINDOW_DAYS)
+    opened = db.query(func.count(models.OpeningEvent.id)).join(models.Bottle).filter(
+        models.Bottle.name == name,
+        models.Bottle.initial_volume == volume,
+        models.OpeningEvent.timestamp >= since
+    ).scalar()
+    return opened / CONSUMPTION_WINDOW_DAYS
+
+
+def _is_triggered(rule: Rule, count: int, days_to_stockout: Optional[float]) -> bool:
+    if rule.kind == "count_below":
+        return count < rule.threshold
+    return days_to_stockout is not None and days_to_stockout < rule.threshold
+
+
+def evaluate(db: Session, name: str, color: Optional[str], volume: float, count: int, publish: bool = True):
+    """
+    Проверяет правила одной позиции после изменения её количества
+    и публикует alert_triggered / alert_cleared при смене состояния
+    (publish=False — только обновить состояние, без событий).
+    """
+    rules = index.rules_for(name, color, volume)
+    if not rules:
+        return
+    days_to_stockout = None
+    if any(rule.kind == "days_to_stockout_below" for rule in rules):
+        days_to_stockout = _days_to_stockout(db, name, volume, count)
+    for rule in rules:
+        triggered = _is_triggered(rule, count, days_to_stockout)
+        if index.set_triggered(rule.id, triggered) and publish:
+            _publish(
+                "alert_triggered" if triggered else "alert_cleared",
+                _event_data(rule, name, color, volume, count, days_to_stockout)
+            )
+
+
+def _days_to_stockout(db: Session, name: str, volume: float, count: int) -> Optional[float]:
+    rate = daily_consumption(db, name, volume)
+    return count / rate if rate > 0 else None
+
+
+def _event_data(rule: Rule, name: str, color: Optional[str], volume: float,
+                count: int, days_to_stockout: Optional[float]) -> dict:
+    return {
+        "rule_id": rule.id,
+        "name": name,
+        "color": color,
+        "volume": volume,
+        "kind": rule.kind,
+        "threshold": rule.threshold,
+        "count": count,
+        "days_to_stockout": days_to_stockout
+    }
+
+
+def _publish(event_type: str, data: dict):
+    # crud выполняется в пуле потоков, рассылка — в цикле событий приложения
+    if _loop is None or _loop.is_closed():
+        return
+    asyncio.run_coroutine_threadsafe(
+        manager.publish_event(event_type, data, line=data["name"], group=ALERTS_TOPIC), _loop
+    )
+
+
+def _find_position(db: Session, name: str, color: Optional[str], volume: float) -> Optional[models.InventoryBottle]:
+    return db.query(models.InventoryBottle).filter(
+        func.lower(models.InventoryBottle.name) == name.lower(),
+        func.coalesce(func.lower(models.InventoryBottle.color), '') == (color or '').lower(),
+        models.InventoryBottle.volume == volume
+    ).first()
+
+
+def evaluate_position(db: Session, name: str, color: Optional[str], volume: float):
+    """Проверяет правила позиции по её текущему остатку на складе."""
+    position = _find_position(db, name, color, volume)
+    if position:
+        evaluate(db, position.name, position.color, position.volume, position.count)
+
+
+def _publish_cleared(db: Session, rule: Rule):
+    # Удалённое сработавшее правило снимается у клиентов так же, как при evaluate.
+    # Если позиции на складе уже нет, остаток считается нулевым
+    position = _find_position(db, rule.name, rule.color, rule.volume)
+    if position:
+        name, color, volume, count = position.name, position.color, position.volume, position.count
+    else:
+        name, color, volume, count = rule.name, rule.color, rule.volume, 0
+    days_to_stockout = None
+    if rule.kind == "days_to_stockout_below":
+        days_to_stockout = _days_to_stockout(db, name, volume, count)
+    _publish("alert_cleared", _event_data(rule, name, color, volume, count, days_to_stockout))
+
+
+def remove_rule(db: Session, rule_id: int):
+    """Удаляет правило из индекса; если оно сработало, публикует alert_cleared."""
+    rule = index.remove(rule_id)
+    if rule is not None:
+        _publish_cleared(db, rule)
+
+
+def _evaluate_all(db: Session, publish: bool):
+    positions = db.query(models.InventoryBottle).with_entities(
+        models.InventoryBottle.name,
+        models.InventoryBottle.color,
+        models.InventoryBottle.volume,
+        models.InventoryBottle.count
+    ).all()
+    for name, color, volume, count in positions:
+        evaluate(db, name, color, volume, count, publish=publish)
+
+
+def rules_changed(db: Session, rule_ids: List[int]):
+    """Вызывается crud после commit создания/удаления правил: оповещает остальные воркеры."""
+    inventory_state.notify(db, RULES_CHANNEL, rule_ids)
+
+
+def _apply_remote_rule_change(db: Session, rule_ids: List[int]):
+    # Правила, созданные или удалённые другими воркерами (через LISTEN/NOTIFY)
+    for rule_id in rule_ids:
+        rule = db.get(models.AlertRule, rule_id)
+        if rule is None:
+            remove_rule(db, rule_id)
+            continue
+        index.add(rule)
+        evaluate_position(db, rule.name, rule.color, rule.volume)
+
+
+def _evaluate_remote_change(db: Session, records: List[inventory_state.InventoryRecord]):
+    # Изменения, сделанные другими воркерами (через LISTEN/NOTIFY)
+    for record in records:
+        evaluate(db, record.name, record.color, record.volume, record.count)
+
+
+def _load():
+    database.get_engine()
+    with database.SessionLocal() as db:
+        first_load = not index.loaded
+        # Правила, удалённые без NOTIFY (например, при обрыве LISTEN), снимаются здесь
+        for rule in index.load(db):
+            _publish_cleared(db, rule)
+        # После старта состояние восстанавливается без событий: это не переход.
+        # При обновлении публикуются переходы, например по days_to_stockout со временем
+        _evaluate_all(db, publish=not first_load)
+
+
+async def run():
+    """Фоновая задача из lifespan: загрузка правил и их периодическое обновление."""
+    global _loop
+    _loop = asyncio.get_running_loop()
+    inventory_state.remote_change_hooks.append(_evaluate_remote_change)
+    inventory_state.channel_handlers[RULES_CHANNEL] = _apply_remote_rule_change
+    try:
+        while True:
+            try:
+                await asyncio.to_thread(_load)
+            except Exception as e:
+                logger.warning(f"Alert rules load failed: {e}")
+            await asyncio.sleep(RULES_RELOAD_SECONDS if index.loaded else 5)
+    finally:
+        inventory_state.channel_handlers.pop(RULES_CHANNEL, None)
+        inventory_state.remote_change_hooks.remove(_evaluate_remote_change)
+        _loop = None
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from . import models, schemas
+from . import alerts, inventory_state, models, schemas
 from typing import List, Optional
 from fastapi import HTTPException
 import logging
@@ -15,6 +15,40 @@ def get_bottle(db: Session, bottle_id: int):
 def get_bottles(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Bottle).offset(skip).limit(limit).all()
 
+def get_bottle_rows(db: Session, skip: int = 0, limit: int = 100):
+    """
+    То же, что get_bottles, но без создания ORM-объектов: словари в форме
+    schemas.Bottle, события открытия подгружаются одним запросом.
+    Страница упорядочена по id, чтобы подзапрос событий выбирал те же бутылки.
+    """
+    page = db.query(models.Bottle).order_by(models.Bottle.id).offset(skip).limit(limit)
+    bottles = [row._asdict() for row in page.with_entities(
+        models.Bottle.name,
+        models.Bottle.initial_volume,
+        models.Bottle.current_volume,
+        models.Bottle.id,
+        models.Bottle.created_at
+    ).all()]
+    if not bottles:
+        return bottles
+
+    events_by_bottle = defaultdict(list)
+    events = db.query(models.OpeningEvent).with_entities(
+        models.OpeningEvent.volume_used,
+        models.OpeningEvent.id,
+        models.OpeningEvent.bottle_id,
+        models.OpeningEvent.timestamp
+    ).filter(
+        # Подзапрос, а не список id: большой limit упёрся бы в лимит параметров SQLite
+        models.OpeningEvent.bottle_id.in_(page.with_entities(models.Bottle.id).subquery().select())
+    ).order_by(models.OpeningEvent.id).all()
+    for event in events:
+        events_by_bottle[event.bottle_id].append(event._asdict())
+
+    for b in bottles:
+        b["opening_events"] = events_by_bottle.get(b["id"], [])
+    return bottles
+
 def create_bottle(db: Session, bottle: schemas.BottleCreate):
     db_bottle = models.Bottle(**bottle.model_dump())
     db.add(db_bottle)
@@ -59,6 +93,17 @@ def create_opening_event(db: Session, event: schemas.OpeningEventCreate, bottle_
 def get_inventory_bottles(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.InventoryBottle).offset(skip).limit(limit).all()
 
+def get_inventory_bottle_rows(db: Session, skip: int = 0, limit: int = 100):
+    """То же, что get_inventory_bottles, но словарями в форме schemas.InventoryBottle."""
+    return [row._asdict() for row in db.query(models.InventoryBottle).with_entities(
+        models.InventoryBottle.name,
+        models.InventoryBottle.color,
+        models.InventoryBottle.volume,
+        models.InventoryBottle.count,
+        models.InventoryBottle.id,
+        models.InventoryBottle.created_at
+    ).offset(skip).limit(limit).all()]
+
 def create_inventory_bottle(db: Session, bottle: schemas.InventoryBottleCreate):
     # Normalize input data
     name = bottle.name.strip() if bottle.name else ""
@@ -111,7 +156,6 @@ def create_inventory_bottle(db: Session, bottle: schemas.InventoryBottleCreate):
         db.refresh(db_bottle)
         print("Successfully created new bottle")
         update_all_snapshots_today(db)
-        return db_bottle
     except Exception as e:
         print(f"Error creating bottle: {str(e)}")
         db.rollback()
@@ -119,6 +163,9 @@ def create_inventory_bottle(db: Session, bottle: schemas.InventoryBottleCreate):
             status_code=400,
             detail=f"Error creating bottle: {str(e)}"
         )
+    # Бутылка уже сохранена: сбой оповещения не должен превращаться в 400
+    inventory_state.apply_change(db, [db_bottle.id])
+    return db_bottle
 
 def delete_inventory_bottle(db: Session, bottle_id: int):
     print(f"\n=== Starting delete_inventory_bottle for id={bottle_id} ===")
@@ -135,11 +182,13 @@ def delete_inventory_bottle(db: Session, bottle_id: int):
         print(f"Deleting bottle: name='{name}', color='{color}', volume={volume}")
         
         # Удаляем все бутылки с такими же name/color/volume
-        deleted_bottles = db.query(models.InventoryBottle).filter(
+        same_position = db.query(models.InventoryBottle).filter(
             models.InventoryBottle.name == name,
             models.InventoryBottle.color == color,
             models.InventoryBottle.volume == volume
-        ).delete(synchronize_session=False)
+        )
+        deleted_ids = [row.id for row in same_position.with_entities(models.InventoryBottle.id)]
+        deleted_bottles = same_position.delete(synchronize_session=False)
         print(f"Deleted {deleted_bottles} bottles from inventory")
         
         # Удаляем все снапшоты для этой позиции за сегодня
@@ -169,11 +218,13 @@ def delete_inventory_bottle(db: Session, bottle_id: int):
             result = create_or_update_snapshot(db, snap)
             print(f"Created/updated snapshot with id={result.id}, count={result.count}")
             print("=== Delete operation completed successfully ===\n")
-            return True
         except Exception as e:
             print(f"Error during delete operation: {str(e)}")
             db.rollback()
             return False
+        # Удаление уже зафиксировано: сбой оповещения не должен давать 404
+        inventory_state.apply_change(db, deleted_ids)
+        return True
     else:
         print(f"Bottle with id={bottle_id} not found")
         return False
@@ -200,9 +251,61 @@ def open_inventory_bottle(db: Session, bottle_id: int):
     db.add(event)
     db.commit()
     db.refresh(event)
+    # После commit события: расход для days_to_stockout должен учитывать это открытие —
+    # и здесь, и в других воркерах, которые проверят алерты по NOTIFY
+    inventory_state.apply_change(db, [bottle_id])
+    alerts.evaluate(db, db_bottle.name, db_bottle.color, db_bottle.volume, db_bottle.count)
     update_all_snapshots_today(db)
     return new_bottle
 
+def add_inventory_bottle(db: Session, bottle_id: int, count: int):
+    db_bottle = db.query(models.InventoryBottle).filter(models.InventoryBottle.id == bottle_id).first()
+    if not db_bottle:
+        return None
+    db_bottle.count += count
+    db.commit()
+    inventory_state.apply_change(db, [bottle_id])
+    alerts.evaluate(db, db_bottle.name, db_bottle.color, db_bottle.volume, db_bottle.count)
+    # Логируем пополнение
+    event = schemas.InventoryEventCreate(
+        name=db_bottle.name,
+        color=db_bottle.color,
+        volume=db_bottle.volume,
+        count=count,
+        type="add"
+    )
+    create_inventory_event(db, event)
+    db.refresh(db_bottle)
+    return db_bottle
+
+def _alert_rule_response(rule: models.AlertRule) -> schemas.AlertRule:
+    result = schemas.AlertRule.model_validate(rule)
+    result.triggered = rule.id in alerts.index.triggered
+    return result
+
+def get_alert_rules(db: Session):
+    rules = db.query(models.AlertRule).order_by(models.AlertRule.id).all()
+    return [_alert_rule_response(rule) for rule in rules]
+
+def create_alert_rule(db: Session, rule: schemas.AlertRuleCreate):
+    db_rule = models.AlertRule(**rule.model_dump())
+    db.add(db_rule)
+    db.commit()
+    db.refresh(db_rule)
+    alerts.index.add(db_rule)
+    alerts.rules_changed(db, [db_rule.id])
+    # Сразу проверяем правило по текущему остатку позиции
+    alerts.evaluate_position(db, db_rule.name, db_rule.color, db_rule.volume)
+    return _alert_rule_response(db_rule)
+
+def delete_alert_rule(db: Session, rule_id: int):
+    deleted = db.query(models.AlertRule).filter(models.AlertRule.id == rule_id).delete()
+    db.commit()
+    alerts.remove_rule(db, rule_id)
+    if deleted:
+        alerts.rules_changed(db, [rule_id])
+    return bool(deleted)
+
 def create_or_update_snapshot(db: Session, snapshot: schemas.InventorySnapshotCreate):
     # Проверяем, есть ли уже снапшот на эту дату для этой позиции
     print(f"Trying to create/update snapshot: {snapshot.name}, count={snapshot.count}, date={snapshot.date}")
@@ -255,60 +358,57 @@ def get_snapshots_with_carry_forward(db: Session, start_date, end_date):
     """
     Для каждого дня в диапазоне [start_date, end_date] и для каждой уникальной позиции (name, color, volume)
     возвращает снапшот. Если на дату нет снапшота — берёт последний предыдущий (carry-forward).
-    Возвращает список InventorySnapshot (без id, т.к. виртуальные).
+    Возвращает список словарей в форме schemas.InventorySnapshot (id=0, т.к. виртуальные).
     """
-    # Получаем все снапшоты за период и до start_date
-    all_snaps = db.query(models.InventorySnapshot).filter(
+    # Получаем все снапшоты за период и до start_date, только нужные колонки
+    all_snaps = db.query(models.InventorySnapshot).with_entities(
+        models.InventorySnapshot.name,
+        models.InventorySnapshot.color,
+        models.InventorySnapshot.volume,
+        models.InventorySnapshot.count,
+        models.InventorySnapshot.date
+    ).filter(
         models.InventorySnapshot.date <= end_date
     ).order_by(models.InventorySnapshot.name, models.InventorySnapshot.color, models.InventorySnapshot.volume, models.InventorySnapshot.date).all()
 
-    # Собираем уникальные позиции
-    positions = set((s.name, s.color, s.volume) for s in all_snaps)
-    
-    # Для каждой позиции строим список снапшотов по дате
+    # Для каждой позиции — список (дата, count) по возрастанию даты
     snaps_by_pos = defaultdict(list)
-    for s in all_snaps:
-        key = (s.name, s.color, s.volume)
-        snaps_by_pos[key].append(s)
+    for name, color, volume, count, date in all_snaps:
+        d = date.date() if hasattr(date, 'date') else date
+        snaps_by_pos[(name, color, volume)].append((d, count))
 
-    # Для быстрого поиска последнего снапшота на дату
-    last_snap_by_pos_and_date = defaultdict(dict)  # (pos) -> {date: snap}
-    for key, snaps in snaps_by_pos.items():
-        last = None
-        for s in snaps:
-            d = s.date.date() if hasattr(s.date, 'date') else s.date
-            last = s
-            last_snap_by_pos_and_date[key][d] = last
-
-    # Для каждой даты и позиции строим carry-forward снапшот
-    result = []
     cur_date = start_date.date() if hasattr(start_date, 'date') else start_date
     end_date_val = end_date.date() if hasattr(end_date, 'date') else end_date
     days = []
     while cur_date <= end_date_val:
         days.append(cur_date)
         cur_date += timedelta(days=1)
-    for day in days:
-        for pos in positions:
-            # Ищем снапшот на этот день или последний предыдущий
-            snap = None
-            # Прямо на этот день
-            if day in last_snap_by_pos_and_date[pos]:
-                snap = last_snap_by_pos_and_date[pos][day]
-            else:
-                # Ищем последний предыдущий
-                prev_days = [d for d in last_snap_by_pos_and_date[pos] if d <= day]
-                if prev_days:
-                    last_day = max(prev_days)
-                    snap = last_snap_by_pos_and_date[pos][last_day]
-            if snap:
-                # Возвращаем как виртуальный снапшот (без id)
-                result.append(schemas.InventorySnapshot(
-                    id=0,  # виртуальный
-                    name=snap.name,
-                    color=snap.color,
-                    volume=snap.volume,
-                    count=snap.count,
-                    date=day
-                ))
-    return result 
\ No newline at end of file
+
+    # Один проход по снапшотам позиции вместе с днями: count на каждый день
+    # (снапшот на этот день или последний предыдущий), None — данных ещё нет
+    counts_by_pos = {}
+    for pos, snaps in snaps_by_pos.items():
+        counts = []
+        i, last = 0, None
+        for day in days:
+            while i < len(snaps) and snaps[i][0] <= day:
+                last = snaps[i][1]
+                i += 1
+            counts.append(last)
+        counts_by_pos[pos] = counts
+
+    result = []
+    for day_index, day in enumerate(days):
+        day_dt = datetime(day.year, day.month, day.day)
+        for (name, color, volume), counts in counts_by_pos.items():
+            count = counts[day_index]
+            if count is not None:
+                result.append({
+                    "name": name,
+                    "color": color,
+                    "volume": volume,
+                    "count": count,
+                    "date": day_dt,
+                    "id": 0  # виртуальный
+                })
+    return result
@@ -0,0 +1,278 @@
+"""
+Состояние склада (inventory_bottles) в памяти процесса.
+
+GET /inventory/ отдаётся отсюда без обращения к базе. Хранилище:
+  - загружается при старте (в фоне, пока не загружено — чтение идёт из базы);
+  - обновляется write-путями crud через apply_change;
+  - получает изменения других воркеров через Postgres LISTEN/NOTIFY;
+  - периодически сверяется с базой (reconcile) на случай расхождений,
+    например после seed_data.py или ручных правок в базе.
+"""
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from . import database, models
+
+logger = logging.getLogger("uvicorn")
+
+NOTIFY_CHANNEL = "inventory_changed"
+RECONCILE_INTERVAL_SECONDS = float(os.getenv("INVENTORY_RECONCILE_SECONDS", "60"))
+
+# Отличает собственные уведомления от уведомлений других воркеров
+INSTANCE_ID = uuid.uuid4().hex
+
+# Вызываются после применения изменений, пришедших от других воркеров
+remote_change_hooks: List[Callable[[Session, List["InventoryRecord"]], None]] = []
+
+# Другие каналы на том же LISTEN-соединении: канал -> обработчик(db, ids)
+# изменений, сделанных другими воркерами (например, правила алертов)
+channel_handlers: Dict[str, Callable[[Session, List[int]], None]] = {}
+
+_COLUMNS = (
+    models.InventoryBottle.name,
+    models.InventoryBottle.color,
+    models.InventoryBottle.volume,
+    models.InventoryBottle.count,
+    models.InventoryBottle.id,
+    models.InventoryBottle.created_at,
+)
+
+
+class InventoryRecord:
+    __slots__ = ("name", "color", "volume", "count", "id", "created_at")
+
+    def __init__(self, name, color, volume, count, id, created_at):
+        self.name = name
+        self.color = color
+        self.volume = volume
+        self.count = count
+        self.id = id
+        self.created_at = created_at
+
+    def as_tuple(self):
+        return (self.name, self.color, self.volume, self.count, self.id, self.created_at)
+
+    def as_dict(self) -> dict:
+        # Порядок полей как в schemas.InventoryBottle
+        return {
+            "name": self.name,
+            "color": self.color,
+            "volume": self.volume,
+            "count": self.count,
+            "id": self.id,
+            "created_at": self.created_at,
+        }
+
+
+class InventoryStore:
+    def __init__(self):
+        self._records: Dict[int, InventoryRecord] = {}
+        self._rows: Optional[List[dict]] = None  # кэш ответа, сбрасывается при изменениях
+        self._lock = threading.Lock()
+        self._version = 0  # увеличивается при каждом refresh
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records = {}
+            self._rows = None
+            self.loaded = False
+
+    @staticmethod
+    def _fetch(db: Session, ids: Optional[Iterable[int]] = None) -> Dict[int, InventoryRecord]:
+        query = db.query(models.InventoryBottle).with_entities(*_COLUMNS)
+        if ids is not None:
+            query = query.filter(models.InventoryBottle.id.in_(list(ids)))
+        return {row.id: InventoryRecord(*row) for row in query.order_by(models.InventoryBottle.id).all()}
+
+    def _replace_from(self, db: Session):
+        """
+        Полностью перечитывает состояние. Если за время запроса прошёл refresh
+        (version изменилась), снимок мог устареть — запрос повторяется.
+        """
+        for _ in range(3):
+            version = self._version
+            records = self._fetch(db)
+            with self._lock:
+                if self._version != version:
+                    continue
+                previous, self._records = self._records, records
+                self._rows = None
+                self.loaded = True
+                return previous, records
+        raise RuntimeError("Inventory state changes too often to take a consistent snapshot")
+
+    def load(self, db: Session):
+        _, records = self._replace_from(db)
+        logger.info(f"Inventory state loaded: {len(records)} positions")
+
+    def refresh(self, db: Session, ids: Iterable[int]):
+        """Перечитывает указанные id из базы; отсутствующие удаляются."""
+        ids = list(ids)
+        records = self._fetch(db, ids)
+        with self._lock:
+            for bottle_id in ids:
+                if bottle_id in records:
+                    self._records[bottle_id] = records[bottle_id]
+                else:
+                    self._records.pop(bottle_id, None)
+            self._rows = None
+            self._version += 1
+
+    def reconcile(self, db: Session) -> int:
+        """Сверяет состояние с базой и заменяет его. Возвращает число расхождений."""
+        previous, records = self._replace_from(db)
+        drift = sum(
+            1 for bottle_id in previous.keys() | records.keys()
+            if bottle_id not in previous or bottle_id not in records
+            or previous[bottle_id].as_tuple() != records[bottle_id].as_tuple()
+        )
+        if drift:
+            logger.warning(f"Inventory state drift: {drift} positions differed from the database")
+        return drift
+
+    def get(self, bottle_id: int) -> Optional[InventoryRecord]:
+        return self._records.get(bottle_id)
+
+    def list(self, skip: int = 0, limit: int = 100) -> List[dict]:
+        rows = self._rows
+        if rows is None:
+            with self._lock:
+                rows = self._rows = [r.as_dict() for r in self._records.values()]
+        return rows[skip:skip + limit]
+
+
+store = InventoryStore()
+
+
+def apply_change(db: Session, ids: Iterable[int]):
+    """
+    Вызывается crud после commit изменений inventory_bottles:
+    обновляет локальное состояние и оповещает остальные воркеры.
+    """
+    ids = list(ids)
+    if not ids:
+        return
+    store.refresh(db, ids)
+    notify(db, NOTIFY_CHANNEL, ids)
+
+
+def notify(db: Session, channel: str, ids: Iterable[int]):
+    """Оповещает остальные воркеры об изменении записей ids (только Postgres)."""
+    if db.bind.dialect.name == "postgresql":
+        payload = json.dumps({"instance": INSTANCE_ID, "ids": list(ids)})
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+        db.commit()
+
+
+class _NotificationListener(threading.Thread):
+    """LISTEN inventory_changed и каналов channel_handlers на отдельном соединении Postgres."""
+
+    def __init__(self):
+        super().__init__(name="inventory-listener", daemon=True)
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                logger.warning(f"Inventory listener error, reconnecting: {e}")
+                self._stop_event.wait(5)
+
+    def _listen(self):
+        connection = database.get_engine().raw_connection()
+        try:
+            conn = connection.driver_connection
+            conn.autocommit = True
+            listening = set()
+            while not self._stop_event.is_set():
+                # Каналы могут регистрироваться после старта слушателя
+                for channel in {NOTIFY_CHANNEL, *channel_handlers} - listening:
+                    conn.cursor().execute(f"LISTEN {channel}")
+                    listening.add(channel)
+                if select.select([conn], [], [], 1.0) == ([], [], []):
+                    continue
+                conn.poll()
+                ids_by_channel: Dict[str, set] = {}
+                while conn.notifies:
+                    notification = conn.notifies.pop(0)
+                    message = json.loads(notification.payload)
+                    if message["instance"] != INSTANCE_ID:
+                        ids_by_channel.setdefault(notification.channel, set()).update(message["ids"])
+                if not ids_by_channel:
+                    continue
+                with database.SessionLocal() as db:
+                    ids = ids_by_channel.pop(NOTIFY_CHANNEL, None)
+                    if ids:
+                        store.refresh(db, ids)
+                        records = [r for r in map(store.get, ids) if r is not None]
+                        for hook in remote_change_hooks:
+                            hook(db, records)
+                    for channel, ids in ids_by_channel.items():
+                        handler = channel_handlers.get(channel)
+                        if handler is not None:
+                            handler(db, list(ids))
+        finally:
+            connection.invalidate()
+
+
+_listener: Optional[_NotificationListener] = None
+
+
+def _load_and_listen():
+    global _listener
+    engine = database.get_engine()
+    with database.SessionLocal() as db:
+        store.load(db)
+    if engine.dialect.name == "postgresql" and _listener is None:
+        _listener = _NotificationListener()
+        _listener.start()
+
+
+def _reconcile():
+    with database.SessionLocal() as db:
+        store.reconcile(db)
+
+
+async def run():
+    """
+    Фоновая задача из lifespan: загрузка состояния, затем периодическая сверка.
+    Старт приложения не ждёт базу — пока состояние не загружено,
+    /inventory/ читает из базы.
+    """
+    while not store.loaded:
+        try:
+            await asyncio.to_thread(_load_and_listen)
+        except Exception as e:
+            logger.warning(f"Inventory state load failed, retrying: {e}")
+            await asyncio.sleep(5)
+    while True:
+        await asyncio.sleep(RECONCILE_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(_reconcile)
+        except Exception as e:
+            logger.warning(f"Inventory state reconcile failed: {e}")
+
+
+def stop():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    store.clear()
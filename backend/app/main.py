@@ -1,15 +1,32 @@
-from fastapi import FastAPI, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
 from typing import List
-from . import crud, models, schemas
-from .database import engine, get_db
+from . import alerts, crud, inventory_state, models, schemas
+from . import database
+from .database import dispose_engine, get_db, get_read_db, read_session
+from .responses import ORJSONResponse
 from .websocket import manager
 from datetime import datetime
-
-models.Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="Consumption Dashboard API")
+import asyncio
+import time
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Схема базы создаётся миграциями (alembic upgrade head), а не при старте.
+    # Движок создаётся лениво при первом запросе к базе.
+    inventory_task = asyncio.create_task(inventory_state.run())
+    heartbeat_task = asyncio.create_task(manager.run_heartbeat())
+    alerts_task = asyncio.create_task(alerts.run())
+    yield
+    alerts_task.cancel()
+    heartbeat_task.cancel()
+    inventory_task.cancel()
+    inventory_state.stop()
+    dispose_engine()
+
+app = FastAPI(title="Consumption Dashboard API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -18,28 +35,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[database.STICKY_PRIMARY_HEADER],
 )
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+    # После успешного изменения клиент какое-то время читает с основной базы,
+    # чтобы не увидеть устаревшие данные с отстающей реплики
+    if (database.DATABASE_READ_URL
+            and request.method not in ("GET", "HEAD", "OPTIONS")
+            and response.status_code < 400):
+        response.headers[database.STICKY_PRIMARY_HEADER] = str(time.time() + database.READ_YOUR_WRITES_SECONDS)
+    return response
+
 @app.get("/bottles/", response_model=List[schemas.Bottle])
-def read_bottles(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    bottles = crud.get_bottles(db, skip=skip, limit=limit)
-    return bottles
+def read_bottles(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
+    # Списки только для чтения отдаём напрямую через orjson, минуя повторную валидацию response_model
+    return ORJSONResponse(crud.get_bottle_rows(db, skip=skip, limit=limit))
 
 @app.post("/bottles/", response_model=schemas.Bottle)
 async def create_bottle(bottle: schemas.BottleCreate, db: Session = Depends(get_db)):
     db_bottle = crud.create_bottle(db, bottle)
-    await manager.broadcast({
-        "event_type": "bottle_created",
-        "data": {
-            "id": db_bottle.id,
-            "name": db_bottle.name,
-            "current_volume": db_bottle.current_volume
-        }
-    })
+    await manager.publish_event("bottle_created", {
+        "id": db_bottle.id,
+        "name": db_bottle.name,
+        "current_volume": db_bottle.current_volume
+    }, line=db_bottle.name)
     return db_bottle
 
 @app.get("/bottles/{bottle_id}", response_model=schemas.Bottle)
-def read_bottle(bottle_id: int, db: Session = Depends(get_db)):
+def read_bottle(bottle_id: int, db: Session = Depends(get_read_db)):
     db_bottle = crud.get_bottle(db, bottle_id)
     if db_bottle is None:
         raise HTTPException(status_code=404, detail="Bottle not found")
@@ -50,14 +76,11 @@ async def update_bottle(bottle_id: int, bottle: schemas.BottleUpdate, db: Sessio
     db_bottle = crud.update_bottle(db, bottle_id, bottle)
     if db_bottle is None:
         raise HTTPException(status_code=404, detail="Bottle not found")
-    await manager.broadcast({
-        "event_type": "bottle_updated",
-        "data": {
-            "id": db_bottle.id,
-            "name": db_bottle.name,
-            "current_volume": db_bottle.current_volume
-        }
-    })
+    await manager.publish_event("bottle_updated", {
+        "id": db_bottle.id,
+        "name": db_bottle.name,
+        "current_volume": db_bottle.current_volume
+    }, line=db_bottle.name)
     return db_bottle
 
 @app.delete("/bottles/{bottle_id}")
@@ -75,29 +98,42 @@ async def create_opening_event(
 ):
     db_event = crud.create_opening_event(db, event, bottle_id)
     bottle = crud.get_bottle(db, bottle_id)
-    await manager.broadcast({
-        "event_type": "opening_event_created",
-        "data": {
-            "bottle_id": bottle_id,
-            "volume_used": event.volume_used,
-            "current_volume": bottle.current_volume
-        }
-    })
+    await manager.publish_event("opening_event_created", {
+        "bottle_id": bottle_id,
+        "volume_used": event.volume_used,
+        "current_volume": bottle.current_volume
+    }, line=bottle.name)
     return db_event
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+    if not await manager.connect(websocket):
+        return
     try:
         while True:
-            data = await websocket.receive_text()
-            # Handle incoming WebSocket messages if needed
+            # Без таймаута обработчик полуоткрытого соединения висел бы вечно
+            text = await asyncio.wait_for(websocket.receive_text(), manager.idle_timeout)
+            # Любое сообщение клиента (в т.ч. ответ на ping) — признак живого соединения
+            manager.touch(websocket)
+            await manager.handle_client_message(websocket, text)
+    except asyncio.TimeoutError:
+        await manager.evict(websocket, "idle timeout")
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
 
+@app.get("/metrics/websocket")
+def websocket_metrics():
+    return manager.gauges()
+
 @app.get("/inventory/", response_model=List[schemas.InventoryBottle])
-def read_inventory(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_inventory_bottles(db, skip=skip, limit=limit)
+def read_inventory(request: Request, skip: int = 0, limit: int = 100):
+    if inventory_state.store.loaded:
+        return ORJSONResponse(inventory_state.store.list(skip, limit))
+    # Сессия (и проверка реплики) нужна только пока состояние не загружено
+    with read_session(request) as db:
+        return ORJSONResponse(crud.get_inventory_bottle_rows(db, skip=skip, limit=limit))
 
 @app.post("/inventory/", response_model=schemas.InventoryBottle)
 async def create_inventory_bottle(bottle: schemas.InventoryBottleCreate, db: Session = Depends(get_db)):
@@ -144,29 +180,31 @@ def create_or_update_snapshot(snapshot: schemas.InventorySnapshotCreate, db: Ses
     return crud.create_or_update_snapshot(db, snapshot)
 
 @app.get("/inventory_snapshots/", response_model=List[schemas.InventorySnapshot])
-def read_snapshots(start_date: str, end_date: str, db: Session = Depends(get_db)):
+def read_snapshots(start_date: str, end_date: str, db: Session = Depends(get_read_db)):
     # start_date, end_date: YYYY-MM-DD
     start = datetime.fromisoformat(start_date)
     end = datetime.fromisoformat(end_date)
-    return crud.get_snapshots_with_carry_forward(db, start, end)
+    return ORJSONResponse(crud.get_snapshots_with_carry_forward(db, start, end))
 
 @app.post("/inventory/{bottle_id}/add", response_model=schemas.InventoryBottle)
 def add_inventory_bottle(bottle_id: int, count: int, db: Session = Depends(get_db)):
     if count < 1:
         raise HTTPException(status_code=400, detail="Count must be positive")
-    db_bottle = db.query(models.InventoryBottle).filter(models.InventoryBottle.id == bottle_id).first()
+    db_bottle = crud.add_inventory_bottle(db, bottle_id, count)
     if not db_bottle:
         raise HTTPException(status_code=404, detail="Inventory bottle not found")
-    db_bottle.count += count
-    db.commit()
-    # Логируем пополнение
-    event = schemas.InventoryEventCreate(
-        name=db_bottle.name,
-        color=db_bottle.color,
-        volume=db_bottle.volume,
-        count=count,
-        type="add"
-    )
-    crud.create_inventory_event(db, event)
-    db.refresh(db_bottle)
-    return db_bottle 
\ No newline at end of file
+    return db_bottle
+
+@app.get("/alerts/rules", response_model=List[schemas.AlertRule])
+def read_alert_rules(db: Session = Depends(get_db)):
+    return crud.get_alert_rules(db)
+
+@app.post("/alerts/rules", response_model=schemas.AlertRule)
+def create_alert_rule(rule: schemas.AlertRuleCreate, db: Session = Depends(get_db)):
+    return crud.create_alert_rule(db, rule)
+
+@app.delete("/alerts/rules/{rule_id}")
+def delete_alert_rule(rule_id: int, db: Session = Depends(get_db)):
+    if not crud.delete_alert_rule(db, rule_id):
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    return {"message": "Alert rule deleted successfully"}
@@ -23,6 +23,10 @@ class OpeningEvent(Base):
 
     bottle = relationship("Bottle", back_populates="opening_events")
 
+    __table_args__ = (
+        Index('ix_opening_events_bottle_id_timestamp', bottle_id, timestamp),
+    )
+
 class InventoryBottle(Base):
     __tablename__ = "inventory_bottles"
 
@@ -53,6 +57,11 @@ class InventorySnapshot(Base):
     count = Column(Integer, nullable=False)
     date = Column(DateTime(timezone=True), index=True)  # дата snapshot 
 
+    # Поиск снапшота позиции на дату (create_or_update_snapshot)
+    __table_args__ = (
+        Index('ix_inventory_snapshots_position_date', name, color, volume, date),
+    )
+
 class InventoryEvent(Base):
     __tablename__ = "inventory_events"
 
@@ -62,4 +71,15 @@ class InventoryEvent(Base):
     volume = Column(Float, nullable=False)
     count = Column(Integer, nullable=False)  # +N для пополнения, -N для списания
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
-    type = Column(String, nullable=False, default="add")  # 'add' или 'remove' 
\ No newline at end of file
+    type = Column(String, nullable=False, default="add")  # 'add' или 'remove'
+
+class AlertRule(Base):
+    __tablename__ = "alert_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    color = Column(String, nullable=True)
+    volume = Column(Float, nullable=False)
+    kind = Column(String, nullable=False)  # 'count_below' или 'days_to_stockout_below'
+    threshold = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
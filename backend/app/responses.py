@@ -0,0 +1,12 @@
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+from typing import Any
+import orjson
+
+class ORJSONResponse(_ORJSONResponse):
+    """
+    ORJSONResponse с тем же форматом дат, что и у pydantic: время в UTC
+    выводится с суффиксом "Z", а не "+00:00" (timestamptz в Postgres).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
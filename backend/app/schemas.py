@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import validator
 
 class OpeningEventBase(BaseModel):
@@ -106,4 +106,26 @@ class InventoryEventCreate(InventoryEventBase):
 class InventoryEvent(InventoryEventBase):
     model_config = ConfigDict(from_attributes=True)
     id: int
-    timestamp: datetime 
\ No newline at end of file
+    timestamp: datetime
+
+class AlertRuleBase(BaseModel):
+    name: str
+    color: str | None = None
+    volume: float
+    kind: Literal["count_below", "days_to_stockout_below"]
+    threshold: float
+
+    @validator('threshold')
+    def validate_threshold(cls, v):
+        if v < 0:
+            raise ValueError('Threshold cannot be negative')
+        return v
+
+class AlertRuleCreate(AlertRuleBase):
+    pass
+
+class AlertRule(AlertRuleBase):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    created_at: datetime
+    triggered: bool = False
@@ -1,20 +1,294 @@
 from fastapi import WebSocket
-from typing import List, Dict
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+import asyncio
+import ipaddress
 import json
+import logging
+import os
+import time
+
+logger = logging.getLogger("uvicorn")
+
+HEARTBEAT_INTERVAL_SECONDS = float(os.getenv("WS_HEARTBEAT_INTERVAL_SECONDS", "20"))
+# Соединение без входящих сообщений (в т.ч. pong) дольше этого времени закрывается
+IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "60"))
+SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+MAX_CONNECTIONS = int(os.getenv("WS_MAX_CONNECTIONS", "1000"))
+MAX_CONNECTIONS_PER_IP = int(os.getenv("WS_MAX_CONNECTIONS_PER_IP", "20"))
+MAX_TOPICS_PER_CONNECTION = int(os.getenv("WS_MAX_TOPICS_PER_CONNECTION", "100"))
+# Адреса/сети прокси (например, nginx), которым доверяется X-Forwarded-For.
+# Без этого за прокси все клиенты имеют один IP и делят MAX_CONNECTIONS_PER_IP
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(p.strip(), strict=False)
+    for p in os.getenv("WS_TRUSTED_PROXIES", "").split(",") if p.strip()
+]
+
+# 1013 Try Again Later: превышен лимит соединений
+CLOSE_TRY_AGAIN_LATER = 1013
+# 1001 Going Away: соединение закрыто сервером по таймауту
+CLOSE_GOING_AWAY = 1001
+
+PING_MESSAGE = {"event_type": "ping", "data": {}}
+
+# Топики подписки:
+#   "*"                    — все события
+#   "<event_type>"         — события одного типа, например "bottle_updated"
+#   "line:<name>"          — все события одной линейки смолы (по имени)
+#   "<event_type>:<name>"  — события одного типа одной линейки
+#   "<group>", "<group>:<name>" — группа событий, например "alerts"
+# Клиенты, не приславшие subscribe, получают все события, кроме групповых:
+# их получают только явно подписанные (в том числе на "*")
+ALL_TOPIC = "*"
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+def normalize_topic(topic: str) -> str:
+    return topic.strip().lower()
+
+def event_topics(event_type: str, line: Optional[str] = None, group: Optional[str] = None) -> List[str]:
+    """Все топики, подписчики которых должны получить событие."""
+    topics = [ALL_TOPIC, event_type]
+    if group:
+        topics.append(group)
+    if line:
+        line = normalize_topic(line)
+        topics += [f"line:{line}", f"{event_type}:{line}"]
+        if group:
+            topics.append(f"{group}:{line}")
+    return topics
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        max_connections_per_ip: int = MAX_CONNECTIONS_PER_IP,
+        idle_timeout: float = IDLE_TIMEOUT_SECONDS,
+        send_timeout: float = SEND_TIMEOUT_SECONDS,
+        heartbeat_interval: float = HEARTBEAT_INTERVAL_SECONDS,
+    ):
+        self.active_connections: Set[WebSocket] = set()
+        self.max_connections = max_connections
+        self.max_connections_per_ip = max_connections_per_ip
+        self.idle_timeout = idle_timeout
+        self.send_timeout = send_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self._last_seen: Dict[WebSocket, float] = {}
+        self._ip_by_connection: Dict[WebSocket, str] = {}
+        self._connections_per_ip: Dict[str, int] = defaultdict(int)
+        # Индекс подписок: топик -> соединения и обратный для отписки при закрытии
+        self._subscribers: Dict[str, Set[WebSocket]] = defaultdict(set)
+        self._topics_by_connection: Dict[WebSocket, Set[str]] = defaultdict(set)
+        # Клиенты, ещё не приславшие subscribe: получают все события без группы (как раньше)
+        self._implicit_all: Set[WebSocket] = set()
+        self.evicted_total = 0
+        self.rejected_total = 0
+
+    @staticmethod
+    def _client_ip(websocket: WebSocket) -> str:
+        """
+        IP клиента. Если соединение пришло от доверенного прокси, берётся
+        последний адрес X-Forwarded-For, не принадлежащий доверенным прокси.
+        """
+        client = getattr(websocket, "client", None)
+        ip = client.host if client else "unknown"
+        if not _is_trusted_proxy(ip):
+            return ip
+        headers = getattr(websocket, "headers", {})
+        forwarded = [a.strip() for a in headers.get("x-forwarded-for", "").split(",") if a.strip()]
+        for address in reversed(forwarded):
+            if not _is_trusted_proxy(address):
+                return address
+        return ip
+
+    def _release(self, websocket: WebSocket):
+        ip = self._ip_by_connection.pop(websocket)
+        self._connections_per_ip[ip] -= 1
+        if not self._connections_per_ip[ip]:
+            del self._connections_per_ip[ip]
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+    async def connect(self, websocket: WebSocket) -> bool:
+        """Принимает соединение, если не превышены общий лимит и лимит на IP."""
+        ip = self._client_ip(websocket)
+        # _ip_by_connection включает соединения, ожидающие accept: место
+        # занимается до первого await, иначе параллельные подключения превысят лимит
+        if (len(self._ip_by_connection) >= self.max_connections
+                or self._connections_per_ip[ip] >= self.max_connections_per_ip):
+            self.rejected_total += 1
+            logger.warning(f"WebSocket connection from {ip} rejected: connection limit reached")
+            # close() до accept() uvicorn превращает в HTTP 403, а не в код 1013
+            try:
+                await websocket.accept()
+                await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+            except Exception:
+                pass
+            return False
+        self._ip_by_connection[websocket] = ip
+        self._connections_per_ip[ip] += 1
+        try:
+            await websocket.accept()
+        except BaseException:
+            self._release(websocket)
+            raise
+        self.active_connections.add(websocket)
+        self._last_seen[websocket] = time.monotonic()
+        self._implicit_all.add(websocket)
+        return True
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        # Может вызываться повторно: после вытеснения и из обработчика /ws
+        if websocket not in self.active_connections:
+            return
+        self.active_connections.discard(websocket)
+        self._last_seen.pop(websocket, None)
+        self._release(websocket)
+        self.unsubscribe(websocket, list(self._topics_by_connection.get(websocket, ())))
+        self._topics_by_connection.pop(websocket, None)
+        self._implicit_all.discard(websocket)
+
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str]):
+        if websocket not in self.active_connections:
+            return
+        for topic in map(normalize_topic, topics):
+            if len(self._topics_by_connection[websocket]) >= MAX_TOPICS_PER_CONNECTION:
+                break
+            self._subscribers[topic].add(websocket)
+            self._topics_by_connection[websocket].add(topic)
+
+    def unsubscribe(self, websocket: WebSocket, topics: Iterable[str]):
+        for topic in map(normalize_topic, topics):
+            subscribers = self._subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(websocket)
+                if not subscribers:
+                    del self._subscribers[topic]
+            self._topics_by_connection.get(websocket, set()).discard(topic)
+
+    def topics(self, websocket: WebSocket) -> Set[str]:
+        return set(self._topics_by_connection.get(websocket, ()))
+
+    async def handle_client_message(self, websocket: WebSocket, text: str):
+        """
+        Сообщения клиента:
+          {"action": "subscribe", "topics": ["alerts", "line:sunlu"]}
+          {"action": "subscribe", "event_types": ["bottle_updated"], "positions": ["Sunlu"]}
+          {"action": "unsubscribe", ...} — те же поля
+          {"action": "pong"}
+        event_types и positions вместе означают каждый тип для каждой линейки,
+        по отдельности — "<event_type>" или "line:<name>".
+        Первая подписка заменяет получение всех событий без группы, действующее с подключения.
+        На (от)писку сервер отвечает событием subscriptions с текущим списком топиков.
+        """
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return
+        if not isinstance(message, dict) or message.get("action") not in ("subscribe", "unsubscribe"):
+            return
+
+        def strings(field):
+            value = message.get(field)
+            return [v for v in value if isinstance(v, str)] if isinstance(value, list) else []
+
+        topics = strings("topics")
+        event_types, positions = strings("event_types"), strings("positions")
+        if event_types and positions:
+            topics += [f"{t}:{p}" for t in event_types for p in positions]
+        else:
+            topics += event_types + [f"line:{p}" for p in positions]
+
+        if message["action"] == "subscribe":
+            self._implicit_all.discard(websocket)
+            self.subscribe(websocket, topics)
+        else:
+            self.unsubscribe(websocket, topics)
+        await self._send_all([websocket], {
+            "event_type": "subscriptions",
+            "data": {"topics": sorted(self.topics(websocket))}
+        })
+
+    def touch(self, websocket: WebSocket):
+        """Отмечает активность клиента (любое входящее сообщение, включая pong)."""
+        if websocket in self._last_seen:
+            self._last_seen[websocket] = time.monotonic()
+
+    async def evict(self, websocket: WebSocket, reason: str):
+        if websocket not in self.active_connections:
+            return
+        self.disconnect(websocket)
+        self.evicted_total += 1
+        logger.info(f"WebSocket connection evicted: {reason}")
+        try:
+            await asyncio.wait_for(websocket.close(code=CLOSE_GOING_AWAY), self.send_timeout)
+        except Exception:
+            pass
+
+    async def _send_all(self, connections, message: Dict):
+        """
+        Отправляет сообщение всем соединениям параллельно с общим таймаутом:
+        медленный клиент не задерживает остальных, а зависший вытесняется.
+        """
+        if not connections:
+            return
+        tasks = {asyncio.ensure_future(ws.send_json(message)): ws for ws in connections}
+        done, pending = await asyncio.wait(tasks, timeout=self.send_timeout)
+        for task in pending:
+            task.cancel()
+        failed = [(tasks[t], "send timeout") for t in pending]
+        failed += [(tasks[t], f"send failed ({type(t.exception()).__name__})") for t in done if t.exception()]
+        await asyncio.gather(*(self.evict(ws, reason) for ws, reason in failed))
 
     async def broadcast(self, message: Dict):
-        for connection in self.active_connections:
-            await connection.send_json(message)
+        """Отправляет сообщение всем соединениям независимо от подписок (ping)."""
+        await self._send_all(list(self.active_connections), message)
+
+    async def publish(self, topics: Iterable[str], message: Dict, include_implicit: bool = False):
+        """
+        Отправляет сообщение подписчикам любого из топиков, каждому один раз
+        (include_implicit — и клиентам, ещё не приславшим subscribe).
+        Стоимость пропорциональна числу заинтересованных клиентов, а не всех.
+        """
+        recipients = set(self._implicit_all) if include_implicit else set()
+        for topic in topics:
+            subscribers = self._subscribers.get(topic)
+            if subscribers:
+                recipients |= subscribers
+        await self._send_all(list(recipients), message)
+
+    async def publish_event(self, event_type: str, data: Dict, line: Optional[str] = None, group: Optional[str] = None):
+        await self.publish(
+            event_topics(event_type, line, group),
+            {"event_type": event_type, "data": data},
+            include_implicit=group is None
+        )
+
+    async def check_connections(self):
+        """Вытесняет молчащие соединения и пингует остальные."""
+        deadline = time.monotonic() - self.idle_timeout
+        idle = [ws for ws, seen in self._last_seen.items() if seen < deadline]
+        await asyncio.gather(*(self.evict(ws, "idle timeout") for ws in idle))
+        await self.broadcast(PING_MESSAGE)
+
+    async def run_heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.check_connections()
+            except Exception as e:
+                logger.warning(f"WebSocket heartbeat failed: {e}")
+
+    def gauges(self) -> Dict:
+        return {
+            "active_connections": len(self.active_connections),
+            "connections_per_ip_max": max(self._connections_per_ip.values(), default=0),
+            "topics": len(self._subscribers),
+            "evicted_total": self.evicted_total,
+            "rejected_total": self.rejected_total,
+        }
 
-manager = ConnectionManager() 
\ No newline at end of file
+manager = ConnectionManager()
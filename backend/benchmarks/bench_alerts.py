@@ -0,0 +1,29 @@
+"""Бенчмарки индекса алертов: проверка одной позиции не зависит от общего числа правил."""
+from types import SimpleNamespace
+
+import pytest
+
+from app import alerts
+
+
+@pytest.fixture
+def index(monkeypatch, request):
+    positions, rules_per_position = request.param
+    index = alerts.AlertIndex()
+    rule_id = 0
+    for p in range(positions):
+        for r in range(rules_per_position):
+            rule_id += 1
+            index.add(SimpleNamespace(
+                id=rule_id, name=f"Resin {p:05d}", color="Grey", volume=1000.0,
+                kind="count_below", threshold=float(r + 1)
+            ))
+    monkeypatch.setattr(alerts, "index", index)
+    return index
+
+
+@pytest.mark.parametrize("index", [(100, 3), (10_000, 3)], indirect=True, ids=["300-rules", "30000-rules"])
+def bench_evaluate_position(benchmark, index):
+    counts = iter(range(10**9))
+    # Только правила count_below — база для расчёта расхода не нужна
+    benchmark(lambda: alerts.evaluate(None, "RESIN 00042", "grey", 1000.0, next(counts) % 5))
@@ -0,0 +1,69 @@
+"""Бенчмарки основных эндпоинтов через TestClient (включая сериализацию ответа)."""
+import itertools
+from datetime import date, timedelta
+
+import pytest
+
+_counter = itertools.count()
+
+
+def _first_id(client, path):
+    return client.get(path, params={"limit": 1}).json()[0]["id"]
+
+
+@pytest.mark.parametrize("limit", [100, 1000])
+def bench_read_bottles(benchmark, client, limit):
+    response = benchmark(client.get, "/bottles/", params={"limit": limit})
+    assert response.status_code == 200
+
+
+def bench_read_bottle(benchmark, client):
+    bottle_id = _first_id(client, "/bottles/")
+    response = benchmark(client.get, f"/bottles/{bottle_id}")
+    assert response.status_code == 200
+
+
+def bench_create_bottle(benchmark, client):
+    payload = {"name": "Bench resin", "initial_volume": 1000, "current_volume": 1000}
+    response = benchmark.pedantic(client.post, args=("/bottles/",), kwargs={"json": payload}, rounds=50)
+    assert response.status_code == 200
+
+
+def bench_create_opening_event(benchmark, client):
+    bottle_id = _first_id(client, "/bottles/")
+    response = benchmark.pedantic(
+        client.post, args=(f"/bottles/{bottle_id}/events",), kwargs={"json": {"volume_used": 0}}, rounds=50
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("limit", [100, 1000])
+def bench_read_inventory(benchmark, client, limit):
+    response = benchmark(client.get, "/inventory/", params={"limit": limit})
+    assert response.status_code == 200
+
+
+def bench_create_inventory_bottle(benchmark, client):
+    def setup():
+        payload = {"name": f"Bench api resin {next(_counter)}", "volume": 1000, "count": 5}
+        return ("/inventory/",), {"json": payload}
+    benchmark.pedantic(client.post, setup=setup, rounds=20)
+
+
+def bench_open_inventory_bottle(benchmark, client):
+    bottle_id = _first_id(client, "/inventory/")
+    client.post(f"/inventory/{bottle_id}/add", params={"count": 10_000})
+    benchmark.pedantic(client.post, args=(f"/inventory/{bottle_id}/open",), rounds=20)
+
+
+def bench_add_inventory_bottle(benchmark, client):
+    bottle_id = _first_id(client, "/inventory/")
+    benchmark.pedantic(client.post, args=(f"/inventory/{bottle_id}/add",), kwargs={"params": {"count": 1}}, rounds=20)
+
+
+@pytest.mark.parametrize("days", [7, 30])
+def bench_read_snapshots(benchmark, client, days):
+    end = date.today()
+    params = {"start_date": (end - timedelta(days=days)).isoformat(), "end_date": end.isoformat()}
+    response = benchmark(client.get, "/inventory_snapshots/", params=params)
+    assert response.status_code == 200
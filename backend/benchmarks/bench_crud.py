@@ -0,0 +1,176 @@
+"""
+Бенчмарки функций app.crud на синтетических данных.
+Функции, изменяющие данные, замеряются фиксированным числом раундов (pedantic).
+"""
+import itertools
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import alerts, crud, models, schemas
+
+_counter = itertools.count()
+
+
+def _today():
+    return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _any_id(db, model):
+    return db.query(model.id).order_by(model.id).limit(1).scalar()
+
+
+def bench_get_bottle(benchmark, db):
+    bottle_id = _any_id(db, models.Bottle)
+    benchmark(crud.get_bottle, db, bottle_id)
+
+
+@pytest.mark.parametrize("limit", [100, 1000])
+def bench_get_bottles(benchmark, db, limit):
+    benchmark(crud.get_bottles, db, 0, limit)
+
+
+@pytest.mark.parametrize("limit", [100, 1000])
+def bench_get_bottle_rows(benchmark, db, limit):
+    benchmark(crud.get_bottle_rows, db, 0, limit)
+
+
+def bench_create_bottle(benchmark, db):
+    bottle = schemas.BottleCreate(name="Bench resin", initial_volume=1000, current_volume=1000)
+    benchmark.pedantic(crud.create_bottle, args=(db, bottle), rounds=50)
+
+
+def bench_update_bottle(benchmark, db):
+    bottle_id = _any_id(db, models.Bottle)
+    update = schemas.BottleUpdate(current_volume=500)
+    benchmark.pedantic(crud.update_bottle, args=(db, bottle_id, update), rounds=50)
+
+
+def bench_delete_bottle(benchmark, db):
+    def setup():
+        bottle = crud.create_bottle(db, schemas.BottleCreate(name="Bench resin", initial_volume=1000, current_volume=1000))
+        return (db, bottle.id), {}
+    benchmark.pedantic(crud.delete_bottle, setup=setup, rounds=50)
+
+
+def bench_create_opening_event(benchmark, db):
+    bottle_id = _any_id(db, models.Bottle)
+    event = schemas.OpeningEventCreate(volume_used=0)
+    benchmark.pedantic(crud.create_opening_event, args=(db, event, bottle_id), rounds=50)
+
+
+@pytest.mark.parametrize("limit", [100, 1000])
+def bench_get_inventory_bottles(benchmark, db, limit):
+    benchmark(crud.get_inventory_bottles, db, 0, limit)
+
+
+@pytest.mark.parametrize("limit", [100, 1000])
+def bench_get_inventory_bottle_rows(benchmark, db, limit):
+    benchmark(crud.get_inventory_bottle_rows, db, 0, limit)
+
+
+def bench_create_inventory_bottle(benchmark, db):
+    def setup():
+        bottle = schemas.InventoryBottleCreate(name=f"Bench crud resin {next(_counter)}", volume=1000, count=5)
+        return (db, bottle), {}
+    benchmark.pedantic(crud.create_inventory_bottle, setup=setup, rounds=20)
+
+
+def bench_delete_inventory_bottle(benchmark, db):
+    def setup():
+        bottle = crud.create_inventory_bottle(
+            db, schemas.InventoryBottleCreate(name=f"Bench crud resin {next(_counter)}", volume=1000, count=5)
+        )
+        return (db, bottle.id), {}
+    benchmark.pedantic(crud.delete_inventory_bottle, setup=setup, rounds=20)
+
+
+def bench_open_inventory_bottle(benchmark, db):
+    bottle = db.query(models.InventoryBottle).order_by(models.InventoryBottle.id).first()
+    bottle.count = 1_000_000
+    db.commit()
+    benchmark.pedantic(crud.open_inventory_bottle, args=(db, bottle.id), rounds=20)
+
+
+def bench_add_inventory_bottle(benchmark, db):
+    bottle_id = _any_id(db, models.InventoryBottle)
+    benchmark.pedantic(crud.add_inventory_bottle, args=(db, bottle_id, 1), rounds=20)
+
+
+@pytest.fixture
+def alert_index(monkeypatch):
+    # Правила из бенчмарков не должны попадать в индекс приложения
+    index = alerts.AlertIndex()
+    monkeypatch.setattr(alerts, "index", index)
+    return index
+
+
+def _alert_rule(db, threshold=5):
+    bottle = db.query(models.InventoryBottle).order_by(models.InventoryBottle.id).first()
+    return schemas.AlertRuleCreate(
+        name=bottle.name, color=bottle.color, volume=bottle.volume, kind="count_below", threshold=threshold
+    )
+
+
+def bench_get_alert_rules(benchmark, db, alert_index):
+    for threshold in range(100):
+        crud.create_alert_rule(db, _alert_rule(db, threshold))
+    benchmark(crud.get_alert_rules, db)
+
+
+def bench_create_alert_rule(benchmark, db, alert_index):
+    rule = _alert_rule(db)
+    benchmark.pedantic(crud.create_alert_rule, args=(db, rule), rounds=50)
+
+
+def bench_delete_alert_rule(benchmark, db, alert_index):
+    def setup():
+        return (db, crud.create_alert_rule(db, _alert_rule(db)).id), {}
+    benchmark.pedantic(crud.delete_alert_rule, setup=setup, rounds=50)
+
+
+def bench_delete_triggered_alert_rule(benchmark, db, alert_index, monkeypatch):
+    published = []
+    monkeypatch.setattr(alerts, "_publish", lambda event_type, data: published.append((event_type, data)))
+    bottle = db.query(models.InventoryBottle).order_by(models.InventoryBottle.id).first()
+    rule_ids = []
+
+    def setup():
+        # Порог выше остатка — правило срабатывает сразу при создании
+        rule = crud.create_alert_rule(db, _alert_rule(db, threshold=bottle.count + 1))
+        rule_ids.append(rule.id)
+        return (db, rule.id), {}
+    benchmark.pedantic(crud.delete_alert_rule, setup=setup, rounds=20)
+    cleared = [data["rule_id"] for event_type, data in published if event_type == "alert_cleared"]
+    assert cleared == rule_ids
+    assert not alert_index.triggered
+
+
+def bench_create_or_update_snapshot(benchmark, db):
+    snap = db.query(models.InventorySnapshot).first()
+    update = schemas.InventorySnapshotCreate(
+        name=snap.name, color=snap.color, volume=snap.volume, count=snap.count, date=snap.date
+    )
+    benchmark.pedantic(crud.create_or_update_snapshot, args=(db, update), rounds=50)
+
+
+def bench_create_inventory_event(benchmark, db):
+    bottle = db.query(models.InventoryBottle).first()
+    event = schemas.InventoryEventCreate(name=bottle.name, color=bottle.color, volume=bottle.volume, count=1)
+    benchmark.pedantic(crud.create_inventory_event, args=(db, event), rounds=20)
+
+
+def bench_update_all_snapshots_today(benchmark, db):
+    benchmark.pedantic(crud.update_all_snapshots_today, args=(db,), rounds=20)
+
+
+@pytest.mark.parametrize("days", [7, 30])
+def bench_get_snapshots_for_period(benchmark, db, days):
+    end = _today()
+    benchmark(crud.get_snapshots_for_period, db, end - timedelta(days=days), end)
+
+
+@pytest.mark.parametrize("days", [7, 30])
+def bench_get_snapshots_with_carry_forward(benchmark, db, days):
+    end = _today()
+    benchmark(crud.get_snapshots_with_carry_forward, db, end - timedelta(days=days), end)
@@ -0,0 +1,25 @@
+"""Бенчмарки in-memory состояния склада (app.inventory_state)."""
+import pytest
+
+from app.inventory_state import InventoryStore
+
+
+@pytest.fixture
+def store(db):
+    store = InventoryStore()
+    store.load(db)
+    return store
+
+
+@pytest.mark.parametrize("limit", [100, 1000])
+def bench_store_list(benchmark, store, limit):
+    benchmark(store.list, 0, limit)
+
+
+def bench_store_refresh_one(benchmark, store, db):
+    bottle_id = next(iter(store.list(0, 1)))["id"]
+    benchmark(store.refresh, db, [bottle_id])
+
+
+def bench_store_reconcile(benchmark, store, db):
+    benchmark(store.reconcile, db)
@@ -0,0 +1,91 @@
+"""
+Чтение с реплики (DATABASE_READ_URL) на двух базах: основной и её копии,
+которая не получает записей, то есть «отстаёт» навсегда. Проверяются
+маршрутизация чтений, read-your-writes по X-DB-Primary-Until и переход
+на основную базу при недоступной реплике.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import database
+
+BOTTLE = {"name": "Bench replica resin", "initial_volume": 1000, "current_volume": 1000}
+
+
+@pytest.fixture
+def replica_client(client, replica_database_url, monkeypatch):
+    database.dispose_engine()
+    monkeypatch.setattr(database, "DATABASE_READ_URL", replica_database_url)
+    yield client
+    database.dispose_engine()
+
+
+@pytest.fixture
+def replica_down(client, tmp_path, monkeypatch):
+    # Каталога нет, поэтому SQLite не может открыть базу — как недоступный хост
+    database.dispose_engine()
+    monkeypatch.setattr(database, "DATABASE_READ_URL", f"sqlite:///{tmp_path}/missing/replica.db")
+    yield client
+    database.dispose_engine()
+
+
+def bench_read_from_replica(benchmark, replica_client):
+    """Без заголовка чтение идёт на реплику, где новой бутылки нет."""
+    bottle_id = replica_client.post("/bottles/", json=BOTTLE).json()["id"]
+    response = benchmark(replica_client.get, f"/bottles/{bottle_id}")
+    assert response.status_code == 404
+
+
+def bench_read_your_writes(benchmark, replica_client):
+    """Клиент, вернувший X-DB-Primary-Until, читает свою запись с основной базы."""
+    created = replica_client.post("/bottles/", json=BOTTLE)
+    header = database.STICKY_PRIMARY_HEADER
+    assert float(created.headers[header]) > time.time()
+    response = benchmark(
+        replica_client.get, f"/bottles/{created.json()['id']}", headers={header: created.headers[header]}
+    )
+    assert response.status_code == 200
+
+    expired = replica_client.get(f"/bottles/{created.json()['id']}", headers={header: str(time.time() - 1)})
+    assert expired.status_code == 404
+
+
+def bench_read_with_replica_down(benchmark, replica_down):
+    """Недоступная реплика: чтения идут на основную базу."""
+    bottle_id = replica_down.post("/bottles/", json=BOTTLE).json()["id"]
+    response = benchmark(replica_down.get, f"/bottles/{bottle_id}")
+    assert response.status_code == 200
+
+
+def bench_replica_probe_single_flight(benchmark, replica_client, monkeypatch):
+    """Пока один поток проверяет зависшую реплику, остальные не ждут и не проверяют её сами."""
+    probes = []
+    hang = threading.Event()
+
+    def slow_probe(engine):
+        probes.append(1)
+        hang.wait(5)
+        return 0.0
+
+    monkeypatch.setattr(database, "_replica_lag_seconds", slow_probe)
+
+    def concurrent_reads():
+        probes.clear()
+        hang.clear()
+        database._replica_state.update(checked_at=0.0, usable=False)
+        with ThreadPoolExecutor(16) as pool:
+            prober = pool.submit(database.replica_is_usable)
+            while not probes:
+                time.sleep(0.001)
+            others = [pool.submit(database.replica_is_usable) for _ in range(64)]
+            results = [f.result() for f in others]
+            hang.set()
+            prober.result()
+        return results
+
+    results = benchmark.pedantic(concurrent_reads, rounds=10)
+    assert probes == [1]
+    assert results == [False] * 64
@@ -0,0 +1,80 @@
+"""
+Сериализация 10k строк списка /inventory/: путь FastAPI по умолчанию
+(валидация response_model по ORM-объектам + jsonable_encoder + json.dumps)
+против ORJSONResponse и TypeAdapter.dump_json по словарям из with_entities.
+"""
+import json
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+from app import models, schemas
+from app.responses import ORJSONResponse
+
+ROWS = 10_000
+CREATED_AT = datetime(2025, 1, 1, 12, 30)
+
+
+class InventoryRow(TypedDict):
+    name: str
+    color: Optional[str]
+    volume: float
+    count: int
+    id: int
+    created_at: datetime
+
+
+inventory_adapter = TypeAdapter(List[schemas.InventoryBottle])
+# Тип совпадает со строками-словарями, поэтому dump_json не предупреждает
+# о несовпадении и не тратит на это время
+row_adapter = TypeAdapter(List[InventoryRow])
+
+
+def default_body(rows: List[dict]) -> bytes:
+    validated = inventory_adapter.validate_python([models.InventoryBottle(**row) for row in rows], from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+@pytest.fixture(scope="module")
+def row_dicts():
+    return [
+        {"name": f"Resin {i:05d}", "color": "Grey", "volume": 1000.0, "count": i % 50, "id": i, "created_at": CREATED_AT}
+        for i in range(ROWS)
+    ]
+
+
+@pytest.fixture(scope="module")
+def orm_objects(row_dicts):
+    return [models.InventoryBottle(**row) for row in row_dicts]
+
+
+def bench_default_response_model(benchmark, orm_objects):
+    def serialize():
+        validated = inventory_adapter.validate_python(orm_objects, from_attributes=True)
+        return JSONResponse(jsonable_encoder(validated)).body
+    benchmark.group = "serialize-10k"
+    benchmark(serialize)
+
+
+def bench_orjson_response(benchmark, row_dicts):
+    # Быстрый путь должен отдавать тот же JSON, что и путь по умолчанию,
+    # в том числе для времени с часовым поясом (timestamptz в Postgres)
+    sample = row_dicts[:100]
+    aware = [dict(row, created_at=CREATED_AT.replace(tzinfo=timezone.utc)) for row in sample]
+    for rows in (sample, aware):
+        assert ORJSONResponse(rows).body == default_body(rows)
+
+    benchmark.group = "serialize-10k"
+    benchmark(lambda: ORJSONResponse(row_dicts).body)
+
+
+def bench_type_adapter_dump_json(benchmark, row_dicts):
+    benchmark.group = "serialize-10k"
+    assert json.loads(row_adapter.dump_json(row_dicts[:100])) == json.loads(default_body(row_dicts[:100]))
+    benchmark(row_adapter.dump_json, row_dicts)
+
@@ -0,0 +1,130 @@
+"""Бенчмарки рассылки событий по WebSocket."""
+import asyncio
+import itertools
+import json
+
+import pytest
+
+from app.websocket import ConnectionManager
+
+MESSAGE = {
+    "event_type": "bottle_updated",
+    "data": {"id": 1, "name": "Resin 0001", "current_volume": 500.0},
+}
+
+
+class FakeWebSocket:
+    """Минимальная замена WebSocket: сериализует сообщение, но никуда не пишет."""
+
+    def __init__(self):
+        self.sent = 0
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        self.sent += 1
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.mark.parametrize("clients", [10, 100, 1000])
+def bench_broadcast_fanout(benchmark, loop, clients):
+    manager = ConnectionManager(max_connections=clients, max_connections_per_ip=clients)
+    sockets = [FakeWebSocket() for _ in range(clients)]
+    for ws in sockets:
+        loop.run_until_complete(manager.connect(ws))
+    benchmark(lambda: loop.run_until_complete(manager.broadcast(MESSAGE)))
+    assert all(ws.sent == sockets[0].sent for ws in sockets)
+
+
+@pytest.mark.parametrize("clients", [1, 10])
+def bench_broadcast_end_to_end(benchmark, client, clients):
+    """POST /bottles/ и получение bottle_created всеми подключёнными клиентами."""
+    payload = {"name": "Bench resin", "initial_volume": 1000, "current_volume": 1000}
+    sockets = [client.websocket_connect("/ws") for _ in range(clients)]
+    connections = [ws.__enter__() for ws in sockets]
+
+    def roundtrip():
+        client.post("/bottles/", json=payload)
+        for ws in connections:
+            assert ws.receive_json()["event_type"] == "bottle_created"
+
+    try:
+        benchmark.pedantic(roundtrip, rounds=20)
+    finally:
+        for ws in sockets:
+            ws.__exit__(None, None, None)
+
+
+TOPICS = 50
+
+
+@pytest.fixture
+def topic_manager(loop):
+    """1000 клиентов, подписанных на одну из 50 линеек (по 20 на топик)."""
+    clients = 1000
+    manager = ConnectionManager(max_connections=clients, max_connections_per_ip=clients)
+    sockets = [FakeWebSocket() for _ in range(clients)]
+    for i, ws in enumerate(sockets):
+        loop.run_until_complete(manager.connect(ws))
+        message = json.dumps({"action": "subscribe", "positions": [f"Resin {i % TOPICS:02d}"]})
+        loop.run_until_complete(manager.handle_client_message(ws, message))
+    for ws in sockets:
+        ws.sent = 0
+    return manager, sockets
+
+
+def bench_publish_by_topic(benchmark, loop, topic_manager):
+    """Событие одной линейки доходит только до её 20 подписчиков."""
+    manager, sockets = topic_manager
+    lines = itertools.cycle(f"Resin {i:02d}" for i in range(TOPICS))
+    published = itertools.count(1)
+    benchmark.group = "fanout-1000-clients-50-topics"
+
+    def publish():
+        line = next(lines)
+        loop.run_until_complete(manager.publish_event("bottle_updated", dict(MESSAGE["data"], name=line), line=line))
+        return next(published)
+
+    total = benchmark(publish)
+    assert sum(ws.sent for ws in sockets) == total * len(sockets) // TOPICS
+
+
+def bench_broadcast_all_1000(benchmark, loop, topic_manager):
+    """Для сравнения: то же событие всем 1000 клиентам, как до подписок."""
+    manager, _ = topic_manager
+    benchmark.group = "fanout-1000-clients-50-topics"
+    benchmark(lambda: loop.run_until_complete(manager.broadcast(MESSAGE)))
+
+
+def bench_publish_alert_skips_default_clients(benchmark, loop):
+    """Алерт доходит до 10 подписчиков "alerts", но не до 1000 клиентов без подписок."""
+    manager = ConnectionManager(max_connections=1010, max_connections_per_ip=1010)
+    default_sockets = [FakeWebSocket() for _ in range(1000)]
+    alert_sockets = [FakeWebSocket() for _ in range(10)]
+    for ws in default_sockets + alert_sockets:
+        loop.run_until_complete(manager.connect(ws))
+    subscribe = json.dumps({"action": "subscribe", "topics": ["alerts"]})
+    for ws in alert_sockets:
+        loop.run_until_complete(manager.handle_client_message(ws, subscribe))
+        ws.sent = 0
+    published = itertools.count(1)
+    benchmark.group = "alerts-1010-clients"
+
+    def publish():
+        loop.run_until_complete(manager.publish_event("alert_triggered", {"rule_id": 1}, line="Resin 00", group="alerts"))
+        return next(published)
+
+    total = benchmark(publish)
+    assert all(ws.sent == 0 for ws in default_sockets)
+    assert all(ws.sent == total for ws in alert_sockets)
+
+    # Событие без группы клиенты без подписок по-прежнему получают
+    loop.run_until_complete(manager.publish_event("bottle_updated", MESSAGE["data"], line="Resin 00"))
+    assert all(ws.sent == 1 for ws in default_sockets)
@@ -0,0 +1,154 @@
+"""
+Общие фикстуры бенчмарков.
+
+Каждый бенчмарк, использующий базу, прогоняется на SQLite и, если задан
+BENCH_POSTGRES_URL (или --postgres-url) и сервер доступен, на Postgres.
+Схема создаётся миграциями, данные — benchmarks.datagen.
+
+Данные генерируются один раз в базу-шаблон, которая не изменяется.
+Каждый бенчмарк работает с собственной копией шаблона, поэтому записи
+одного бенчмарка не меняют данные, которые читают следующие, и результат
+не зависит от порядка запуска и -k.
+
+База по BENCH_POSTGRES_URL не изменяется: она нужна только для подключения
+к серверу, на котором создаются и после прогона удаляются временные базы
+bench_<uuid>. Пользователю нужно право CREATEDB.
+"""
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.orm import Session
+
+from app import database
+from benchmarks import schema
+from benchmarks.datagen import DatasetSize, generate
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("dataset")
+    group.addoption("--skus", type=int, default=DatasetSize.skus)
+    group.addoption("--days", type=int, default=DatasetSize.days)
+    group.addoption("--opens-per-day", type=int, default=DatasetSize.opens_per_day)
+    group.addoption("--postgres-url", default=os.getenv("BENCH_POSTGRES_URL"))
+
+
+@pytest.fixture(scope="session")
+def dataset_size(request):
+    return DatasetSize(
+        skus=request.config.getoption("--skus"),
+        days=request.config.getoption("--days"),
+        opens_per_day=request.config.getoption("--opens-per-day"),
+    )
+
+
+class Template(NamedTuple):
+    url: str
+    # Для Postgres — URL для подключения к серверу при копировании шаблона
+    server_url: Optional[str] = None
+
+
+@contextmanager
+def _throwaway_postgres(server_url: str, template: Optional[str] = None):
+    """Создаёт на сервере временную базу (копию template) и удаляет её после прогона."""
+    url = make_url(server_url)
+    name = f"bench_{uuid.uuid4().hex[:12]}"
+    create = f'CREATE DATABASE "{name}"'
+    if template:
+        create += f' TEMPLATE "{template}"'
+    try:
+        admin = create_engine(url, isolation_level="AUTOCOMMIT")
+    except ImportError as e:
+        pytest.skip(f"Драйвер Postgres не установлен: {e}")
+    try:
+        with admin.connect() as conn:
+            conn.execute(text(create))
+    except OperationalError:
+        admin.dispose()
+        pytest.skip(f"Postgres недоступен: {url!r}")
+    except ProgrammingError as e:
+        admin.dispose()
+        pytest.skip(f"Не удалось создать временную базу: {e.orig}")
+    try:
+        yield url.set(database=name).render_as_string(hide_password=False)
+    finally:
+        with admin.connect() as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+        admin.dispose()
+
+
+@contextmanager
+def _template_url(request, tmp_path_factory):
+    if request.param == "sqlite":
+        yield Template(f"sqlite:///{tmp_path_factory.mktemp('bench')}/template.db")
+        return
+    server_url = request.config.getoption("--postgres-url")
+    if not server_url:
+        pytest.skip("Postgres не настроен (BENCH_POSTGRES_URL)")
+    with _throwaway_postgres(server_url) as url:
+        yield Template(url, server_url)
+
+
+@pytest.fixture(scope="session", params=["sqlite", "postgres"])
+def dataset_template(request, tmp_path_factory, dataset_size):
+    """Временная база со схемой и синтетическими данными; бенчмарки её не изменяют."""
+    with _template_url(request, tmp_path_factory) as template:
+        schema.upgrade(template.url)
+        engine = create_engine(template.url)
+        with Session(engine) as db:
+            generate(db, dataset_size)
+        engine.dispose()
+        yield template
+
+
+@contextmanager
+def _copy_of(template: Template, tmp_path, name: str):
+    if template.server_url is None:
+        path = tmp_path / f"{name}.db"
+        shutil.copyfile(make_url(template.url).database, path)
+        yield f"sqlite:///{path}"
+        return
+    with _throwaway_postgres(template.server_url, template=make_url(template.url).database) as url:
+        yield url
+
+
+@pytest.fixture
+def database_url(dataset_template, tmp_path):
+    """Копия шаблона с данными для одного бенчмарка."""
+    with _copy_of(dataset_template, tmp_path, "bench") as url:
+        yield url
+
+
+@pytest.fixture
+def replica_database_url(dataset_template, tmp_path):
+    """Вторая копия шаблона — «реплика», которая не получает записей основной базы."""
+    with _copy_of(dataset_template, tmp_path, "replica") as url:
+        yield url
+
+
+@pytest.fixture
+def db(database_url):
+    engine = create_engine(database_url)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def client(database_url):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    # Приложение создаёт движок лениво по database.DATABASE_URL
+    database.dispose_engine()
+    original_url, database.DATABASE_URL = database.DATABASE_URL, database_url
+    with TestClient(app) as test_client:
+        yield test_client
+    database.dispose_engine()
+    database.DATABASE_URL = original_url
@@ -0,0 +1,153 @@
+"""
+Генератор синтетических данных для бенчмарков.
+
+Создаёт N позиций склада (SKU), историю за M дней и K открытий бутылок
+в день (суммарно по всем позициям), вставляя строки пачками через
+Core insert вместо объектов ORM. Данные детерминированы параметром seed.
+
+Запуск (из каталога backend):
+    python -m benchmarks.datagen --skus 200 --days 365 --opens-per-day 20 \\
+        --database-url sqlite:///bench.db
+Схема должна уже существовать (alembic upgrade head).
+"""
+import argparse
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app import models
+
+CHUNK_SIZE = 5000
+COLORS = ["Grey", "Black", "White", "Clear", "Red", "Blue", None]
+VOLUMES = [500.0, 1000.0]
+
+
+@dataclass
+class DatasetSize:
+    skus: int = 50
+    days: int = 90
+    opens_per_day: int = 10
+
+    def label(self) -> str:
+        return f"{self.skus}sku-{self.days}d-{self.opens_per_day}opd"
+
+
+def _bulk_insert(db: Session, model, rows):
+    for i in range(0, len(rows), CHUNK_SIZE):
+        db.execute(insert(model), rows[i:i + CHUNK_SIZE])
+
+
+def _reset_sequences(db: Session):
+    # id задаются явно, поэтому последовательности Postgres нужно подвинуть
+    if db.bind.dialect.name != "postgresql":
+        return
+    for table in ("bottles", "opening_events", "inventory_bottles", "inventory_snapshots", "inventory_events"):
+        db.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+        ))
+
+
+def generate(db: Session, size: DatasetSize, seed: int = 0, end_date: datetime = None) -> dict:
+    """
+    Заполняет пустую базу синтетическими данными.
+    Возвращает количество вставленных строк по таблицам.
+    """
+    rng = random.Random(seed)
+    end_date = (end_date or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    start_date = end_date - timedelta(days=size.days - 1)
+
+    skus = []
+    for i in range(size.skus):
+        skus.append({
+            "name": f"Resin {i:04d}",
+            "color": COLORS[i % len(COLORS)],
+            "volume": VOLUMES[(i // len(COLORS)) % len(VOLUMES)],
+        })
+
+    # Начальный остаток с запасом, чтобы хватило на весь период
+    expected_opens = size.days * size.opens_per_day / max(size.skus, 1)
+    stock = [int(expected_opens * 2) + rng.randint(5, 30) for _ in skus]
+
+    inventory_events = [
+        {**sku, "count": stock[i], "timestamp": start_date, "type": "add"}
+        for i, sku in enumerate(skus)
+    ]
+    bottles, opening_events, snapshots = [], [], []
+    bottle_id = 0
+    for day_index in range(size.days):
+        day = start_date + timedelta(days=day_index)
+        for _ in range(size.opens_per_day):
+            i = rng.randrange(len(skus))
+            if stock[i] < 1:
+                continue
+            stock[i] -= 1
+            sku = skus[i]
+            bottle_id += 1
+            opened_at = day + timedelta(minutes=rng.randrange(24 * 60))
+            bottles.append({
+                "id": bottle_id,
+                "name": sku["name"],
+                "initial_volume": sku["volume"],
+                "current_volume": sku["volume"],
+                "created_at": opened_at,
+            })
+            opening_events.append({
+                "id": bottle_id,
+                "bottle_id": bottle_id,
+                "timestamp": opened_at,
+                "volume_used": sku["volume"],
+            })
+            inventory_events.append({**sku, "count": -1, "timestamp": opened_at, "type": "remove"})
+        for i, sku in enumerate(skus):
+            snapshots.append({**sku, "count": stock[i], "date": day})
+
+    inventory = [
+        {"id": i + 1, **sku, "count": stock[i], "created_at": start_date}
+        for i, sku in enumerate(skus)
+    ]
+
+    _bulk_insert(db, models.InventoryBottle, inventory)
+    _bulk_insert(db, models.Bottle, bottles)
+    _bulk_insert(db, models.OpeningEvent, opening_events)
+    _bulk_insert(db, models.InventorySnapshot, snapshots)
+    _bulk_insert(db, models.InventoryEvent, inventory_events)
+    _reset_sequences(db)
+    db.commit()
+
+    return {
+        "inventory_bottles": len(inventory),
+        "bottles": len(bottles),
+        "opening_events": len(opening_events),
+        "inventory_snapshots": len(snapshots),
+        "inventory_events": len(inventory_events),
+    }
+
+
+def main():
+    from sqlalchemy import create_engine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skus", type=int, default=DatasetSize.skus)
+    parser.add_argument("--days", type=int, default=DatasetSize.days)
+    parser.add_argument("--opens-per-day", type=int, default=DatasetSize.opens_per_day)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", required=True)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    started = time.perf_counter()
+    with Session(engine) as db:
+        counts = generate(db, DatasetSize(args.skus, args.days, args.opens_per_day), seed=args.seed)
+    elapsed = time.perf_counter() - started
+    for table, count in counts.items():
+        print(f"{table:>20}: {count}")
+    print(f"Done in {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
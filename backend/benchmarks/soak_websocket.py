@@ -0,0 +1,124 @@
+"""
+Soak-тест жизненного цикла WebSocket-соединений.
+
+Подключает тысячи клиентов к ConnectionManager, после чего часть из них
+«пропадает», не закрывая соединение:
+  - hung: отправка никогда не завершается (полуоткрытый TCP, заполненный буфер);
+  - silent: отправка проходит, но клиент не отвечает на ping.
+Живые клиенты отвечают на каждое сообщение. Проверяется, что после
+heartbeat-циклов в active_connections остаются только живые клиенты,
+и сравнивается время broadcast до и после вытеснения.
+
+Запуск (из каталога backend):
+    python -m benchmarks.soak_websocket --connections 5000 --dead-fraction 0.5
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from types import SimpleNamespace
+
+from app.websocket import ConnectionManager
+
+
+class SoakWebSocket:
+    def __init__(self, host: str, behaviour: str):
+        self.client = SimpleNamespace(host=host)
+        self.behaviour = behaviour  # live | hung | silent
+        self.manager = None
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        if self.behaviour == "hung":
+            await asyncio.Event().wait()
+
+    async def send_json(self, message):
+        if self.behaviour == "hung":
+            await asyncio.Event().wait()
+        if self.behaviour == "live":
+            # Живой клиент отвечает на каждое сообщение (pong на ping)
+            self.manager.touch(self)
+
+
+async def timed_broadcast(manager: ConnectionManager) -> float:
+    started = time.perf_counter()
+    await manager.broadcast({"event_type": "bottle_updated", "data": {"id": 1}})
+    return time.perf_counter() - started
+
+
+async def soak(connections: int, dead_fraction: float, hosts: int, idle_timeout: float, send_timeout: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    manager = ConnectionManager(
+        max_connections=connections,
+        max_connections_per_ip=connections,
+        idle_timeout=idle_timeout,
+        send_timeout=send_timeout,
+    )
+    sockets = []
+    for i in range(connections):
+        behaviour = "live"
+        if rng.random() < dead_fraction:
+            behaviour = rng.choice(["hung", "silent"])
+        ws = SoakWebSocket(f"10.0.{(i % hosts) // 256}.{(i % hosts) % 256}", behaviour)
+        ws.manager = manager
+        assert await manager.connect(ws)
+        sockets.append(ws)
+    live = sum(1 for ws in sockets if ws.behaviour == "live")
+
+    # Первый broadcast упирается в send_timeout и вытесняет зависших
+    first_broadcast = await timed_broadcast(manager)
+    after_first = manager.gauges()
+
+    # Heartbeat-циклы: молчащие клиенты вытесняются по idle_timeout
+    cycles = 0
+    started = time.perf_counter()
+    while len(manager.active_connections) > live and cycles < 10:
+        await asyncio.sleep(idle_timeout / 2)
+        await manager.check_connections()
+        cycles += 1
+    eviction_s = time.perf_counter() - started
+
+    steady_broadcast = await timed_broadcast(manager)
+    gauges = manager.gauges()
+    assert gauges["active_connections"] == live, gauges
+    assert all(ws.behaviour == "live" for ws in manager.active_connections)
+
+    return {
+        "connections": connections,
+        "live": live,
+        "hung": sum(1 for ws in sockets if ws.behaviour == "hung"),
+        "silent": sum(1 for ws in sockets if ws.behaviour == "silent"),
+        "first_broadcast_s": first_broadcast,
+        "active_after_first_broadcast": after_first["active_connections"],
+        "heartbeat_cycles": cycles,
+        "eviction_s": eviction_s,
+        "steady_broadcast_s": steady_broadcast,
+        "gauges": gauges,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=5000)
+    parser.add_argument("--dead-fraction", type=float, default=0.5)
+    parser.add_argument("--hosts", type=int, default=500)
+    parser.add_argument("--idle-timeout", type=float, default=1.0)
+    parser.add_argument("--send-timeout", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="путь для JSON с результатами")
+    args = parser.parse_args()
+
+    result = asyncio.run(soak(
+        args.connections, args.dead_fraction, args.hosts, args.idle_timeout, args.send_timeout, args.seed
+    ))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Замер холодного старта приложения.
+
+Каждый прогон выполняется в отдельном процессе, чтобы импорт app.main
+был действительно холодным. Измеряются:
+  - import_s: время импорта app.main;
+  - startup_s: время lifespan-старта (TestClient.__enter__);
+  - first_request_s: время первого запроса, которому нужна база.
+
+Запуск (из каталога backend):
+    python -m benchmarks.startup --runs 10 --output startup.json
+По умолчанию используется временная SQLite-база; для Postgres
+передайте --database-url.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks import schema
+
+PROBE = r'''
+import json, time
+t0 = time.perf_counter()
+from app import main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(main.app)
+client.__enter__()
+t2 = time.perf_counter()
+response = client.get("/bottles/")
+t3 = time.perf_counter()
+client.__exit__(None, None, None)
+assert response.status_code == 200, response.text
+print(json.dumps({"import_s": t1 - t0, "startup_s": t2 - t1, "first_request_s": t3 - t2}))
+'''
+
+
+def run_once(database_url: str) -> dict:
+    env = dict(os.environ, DATABASE_URL=database_url)
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--output", default=None, help="путь для JSON с результатами")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/startup.db"
+        schema.upgrade(database_url)
+        runs = [run_once(database_url) for _ in range(args.runs)]
+
+    summary = {
+        key: {
+            "median": statistics.median(r[key] for r in runs),
+            "min": min(r[key] for r in runs),
+            "max": max(r[key] for r in runs),
+        }
+        for key in runs[0]
+    }
+    result = {"benchmark": "startup", "runs": runs, "summary": summary}
+    for key, stats in summary.items():
+        print(f"{key:>16}: median {stats['median'] * 1000:.1f} ms (min {stats['min'] * 1000:.1f}, max {stats['max'] * 1000:.1f})")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
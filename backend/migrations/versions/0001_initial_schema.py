@@ -0,0 +1,99 @@
+"""initial schema
+
+Схема в том виде, в котором её создавал Base.metadata.create_all.
+Для уже развёрнутой базы: alembic stamp 0001 && alembic upgrade head.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "bottles",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("initial_volume", sa.Float(), nullable=True),
+        sa.Column("current_volume", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_bottles_id", "bottles", ["id"])
+    op.create_index("ix_bottles_name", "bottles", ["name"])
+
+    op.create_table(
+        "opening_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("bottle_id", sa.Integer(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("volume_used", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(["bottle_id"], ["bottles.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_opening_events_id", "opening_events", ["id"])
+
+    op.create_table(
+        "inventory_bottles",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("color", sa.String(), nullable=True),
+        sa.Column("volume", sa.Float(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_inventory_bottles_id", "inventory_bottles", ["id"])
+    op.create_index(
+        "ix_unique_bottle",
+        "inventory_bottles",
+        [sa.text("lower(name)"), sa.text("coalesce(lower(color), '')"), "volume"],
+        unique=True,
+    )
+
+    op.create_table(
+        "inventory_snapshots",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("color", sa.String(), nullable=True),
+        sa.Column("volume", sa.Float(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("date", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_inventory_snapshots_id", "inventory_snapshots", ["id"])
+    op.create_index("ix_inventory_snapshots_date", "inventory_snapshots", ["date"])
+
+    op.create_table(
+        "inventory_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("color", sa.String(), nullable=True),
+        sa.Column("volume", sa.Float(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_inventory_events_id", "inventory_events", ["id"])
+    op.create_index("ix_inventory_events_timestamp", "inventory_events", ["timestamp"])
+
+
+def downgrade() -> None:
+    op.drop_table("inventory_events")
+    op.drop_table("inventory_snapshots")
+    op.drop_index("ix_unique_bottle", table_name="inventory_bottles")
+    op.drop_table("inventory_bottles")
+    op.drop_table("opening_events")
+    op.drop_table("bottles")
@@ -0,0 +1,36 @@
+"""performance indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # История открытий по бутылке, отсортированная по времени
+    op.create_index(
+        "ix_opening_events_bottle_id_timestamp",
+        "opening_events",
+        ["bottle_id", "timestamp"],
+    )
+    # Поиск снапшота позиции на конкретную дату
+    op.create_index(
+        "ix_inventory_snapshots_position_date",
+        "inventory_snapshots",
+        ["name", "color", "volume", "date"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_inventory_snapshots_position_date", table_name="inventory_snapshots")
+    op.drop_index("ix_opening_events_bottle_id_timestamp", table_name="opening_events")
@@ -1,16 +1,24 @@
 import csv
 from datetime import datetime, timedelta
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine
+from app.database import SessionLocal, get_engine
 from app.models import (
     Base, Bottle, OpeningEvent,
     InventoryEvent, InventorySnapshot,
     InventoryBottle
 )
 
-# --- 1. Сброс и создание таблиц ---
-Base.metadata.drop_all(bind=engine)
-Base.metadata.create_all(bind=engine)
+# --- 1. Сброс и создание таблиц миграциями ---
+engine = get_engine()
+alembic_cfg = Config('alembic.ini')
+if inspect(engine).get_table_names() and not inspect(engine).has_table('alembic_version'):
+    # База создана до перехода на миграции: откатывать нечего, удаляем таблицы
+    Base.metadata.drop_all(bind=engine)
+command.downgrade(alembic_cfg, 'base')
+command.upgrade(alembic_cfg, 'head')
 
 def update_all_snapshots_for_date(db: Session, date: datetime):
     """
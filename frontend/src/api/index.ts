@@ -5,6 +5,28 @@ import type { Bottle, OpeningEvent, InventoryBottle } from '../types';
 const API_HOST = typeof window !== 'undefined' ? window.location.hostname : 'localhost';
 const API_URL = `http://${API_HOST}:8000`;
 
+// Read-your-writes: после изменения backend присылает X-DB-Primary-Until,
+// а клиент возвращает его, чтобы следующие чтения шли с основной базы, а не с реплики.
+// Срок проверяет backend по своим часам; здесь — только верхняя граница с запасом.
+const PRIMARY_UNTIL_HEADER = 'X-DB-Primary-Until';
+const PRIMARY_UNTIL_KEEP_MS = 60_000;
+let primaryUntil: { value: string; receivedAt: number } | null = null;
+
+axios.interceptors.response.use((response) => {
+  const value = response.headers[PRIMARY_UNTIL_HEADER.toLowerCase()];
+  if (value) {
+    primaryUntil = { value: String(value), receivedAt: Date.now() };
+  }
+  return response;
+});
+
+axios.interceptors.request.use((config) => {
+  if (primaryUntil && Date.now() - primaryUntil.receivedAt < PRIMARY_UNTIL_KEEP_MS) {
+    config.headers.set(PRIMARY_UNTIL_HEADER, primaryUntil.value);
+  }
+  return config;
+});
+
 export const api = {
   bottles: {
     list: async () => {
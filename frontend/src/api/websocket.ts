@@ -3,6 +3,7 @@ import type { WebSocketMessage } from '../types';
 export class WebSocketClient {
   private ws: WebSocket | null = null;
   private messageHandlers: ((message: WebSocketMessage) => void)[] = [];
+  private topics = new Set<string>();
 
   constructor(private url: string = 'ws://localhost:8000/ws') {}
 
@@ -13,8 +14,20 @@ export class WebSocketClient {
 
     this.ws = new WebSocket(this.url);
 
+    // После (пере)подключения восстанавливаем подписки на топики
+    this.ws.onopen = () => {
+      if (this.topics.size > 0) {
+        this.send({ action: 'subscribe', topics: [...this.topics] });
+      }
+    };
+
     this.ws.onmessage = (event) => {
       const message = JSON.parse(event.data) as WebSocketMessage;
+      // Сервер периодически пингует; без ответа соединение закрывается как неактивное
+      if (message.event_type === 'ping') {
+        this.send({ action: 'pong' });
+        return;
+      }
       this.messageHandlers.forEach(handler => handler(message));
     };
 
@@ -32,6 +45,22 @@ export class WebSocketClient {
     }
   }
 
+  subscribe(topics: string[]) {
+    topics.forEach(topic => this.topics.add(topic));
+    this.send({ action: 'subscribe', topics });
+  }
+
+  unsubscribe(topics: string[]) {
+    topics.forEach(topic => this.topics.delete(topic));
+    this.send({ action: 'unsubscribe', topics });
+  }
+
+  private send(message: object) {
+    if (this.ws?.readyState === WebSocket.OPEN) {
+      this.ws.send(JSON.stringify(message));
+    }
+  }
+
   onMessage(handler: (message: WebSocketMessage) => void) {
     this.messageHandlers.push(handler);
     return () => {
@@ -22,6 +22,16 @@ export interface WebSocketMessage {
     name?: string;
     current_volume?: number;
     volume_used?: number;
+    // alert_triggered / alert_cleared
+    rule_id?: number;
+    color?: string | null;
+    volume?: number;
+    kind?: 'count_below' | 'days_to_stockout_below';
+    threshold?: number;
+    count?: number;
+    days_to_stockout?: number | null;
+    // subscriptions
+    topics?: string[];
   };
 }
 